@@ -12,13 +12,13 @@ import os
 import re
 import json
 import base64
-import requests
-import numpy as np
-import pandas as pd
+import csv
+import hashlib
+import functools
+import threading
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
 import streamlit as st
-import matplotlib.pyplot as plt
-from scipy.stats import gaussian_kde, truncnorm
-from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 
 # ==============
 # App config
@@ -26,9 +26,142 @@ from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 
 st.set_page_config(page_title="Drifting Minds — Profile", layout="centered")
 
+# No ?id= → nothing to show: stop before the heavy imports and secrets below
+record_id = st.query_params.get("id")
+if not record_id:
+    st.error("We couldn’t find your responses.")
+    st.stop()
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # headless: figures are only ever saved to PNG/SVG
+matplotlib.rcParams.update({
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000,
+})
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.font_manager import FontProperties
+from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+
 REDCAP_API_URL = st.secrets.get("REDCAP_API_URL")
 REDCAP_API_TOKEN = st.secrets.get("REDCAP_API_TOKEN")
 
+# ==============
+# Data access
+# ==============
+_FETCH_WORKERS = 8  # concurrent REDCap fetches per server process (one pooled connection each)
+
+@st.cache_resource
+def _redcap_session() -> requests.Session:
+    """Keep-alive HTTP session shared across reruns (reuses the TLS connection)."""
+    session = requests.Session()
+    session.headers.update({"Connection": "keep-alive"})
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_FETCH_WORKERS,
+                          max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Fields this page reads (English names; FR/ES/IT copies carry a _fr/_en/_en_it suffix)
+_CONCEPTS = (
+    "think_ordinary", "scenario", "negative", "absorbed", "percept_fleeting", "think_bizarre",
+    "planning", "spectator", "ruminate", "percept_intense", "percept_narrative",
+    "percept_ordinary", "time_perc_fast", "percept_vague", "replay", "percept_bizarre",
+    "emo_intense", "percept_continuous", "think_nocontrol", "percept_dull", "actor",
+    "think_seq_bizarre", "percept_precise", "percept_imposed", "hear_env", "positive",
+    "think_seq_ordinary", "percept_real", "time_perc_slow", "syn", "creat",
+)
+VVIQ_FIELDS = [f"quest_{g}{i}" for g in "abcd" for i in range(1, 5)]  # quest_a1 … quest_d4
+_VIZ_FIELDS = [
+    "anxiety", "creativity_trait", "chronotype", "sleep_latency", "sleep_duration",
+    "dream_recall", "trajectories", "anytime_20", "anytime_24",
+    *VVIQ_FIELDS,
+    *(f"degreequest_{k}" for k in ("vividness", "immersiveness", "bizarreness", "spontaneity",
+                                   "fleetingness", "emotionality", "sleepiness")),
+    *(f"{p}_{c}" for p in ("freq", "timequest") for c in _CONCEPTS),
+]
+REDCAP_FIELDS = [f + sfx for sfx in ("", "_fr", "_en", "_en_it") for f in _VIZ_FIELDS] + [
+    "questionnaire_complete", "questionnaire_fr_complete",
+    "questionnaire_en_complete", "questionnaire_it_complete",
+]
+
+def _post_record(api_url: str, token: str, record_id: str, fields=()):
+    """POST a one-record CSV export and return its single row as dict (None if not found)."""
+    payload = {
+        "token": token,
+        "content": "record",
+        "format": "csv",
+        "type": "flat",
+        "records[0]": record_id,
+        "rawOrLabel": "raw",
+        "rawOrLabelHeaders": "raw",
+        "exportSurveyFields": "true",
+        "exportDataAccessGroups": "false",
+    }
+    payload.update({f"fields[{i}]": f for i, f in enumerate(fields)})
+    r = _redcap_session().post(api_url, data=payload, timeout=10)
+    r.raise_for_status()
+    return next(csv.DictReader(io.StringIO(r.content.decode("utf-8-sig"))), None)
+
+@st.cache_resource
+def _unfiltered_endpoints() -> set:
+    """API URLs whose project rejected the REDCAP_FIELDS filter (remembered so later fetches skip it)."""
+    return set()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_record(api_url: str, token: str, record_id: str):
+    """Fetch a single REDCap record as dict (cached per endpoint + record_id; errors and misses are not cached)."""
+    if api_url in _unfiltered_endpoints():
+        rec = _post_record(api_url, token, record_id)
+    else:
+        try:
+            rec = _post_record(api_url, token, record_id, REDCAP_FIELDS)
+        except requests.HTTPError as e:
+            # REDCap rejects the whole request if any listed field is unknown → fetch everything
+            if e.response is None or e.response.status_code != 400:
+                raise
+            rec = _post_record(api_url, token, record_id)
+            _unfiltered_endpoints().add(api_url)  # only once the unfiltered export has succeeded
+    if rec is None:
+        # Raise instead of returning None so a participant who submits later is not served a cached miss
+        raise LookupError(record_id)
+    return rec
+
+@st.cache_resource
+def _fetch_pool() -> ThreadPoolExecutor:
+    """Worker threads for REDCap fetches, shared across sessions."""
+    return ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix="redcap")
+
+def fetch_by_record_id(record_id: str) -> Future:
+    """Start fetching a single REDCap record in the background (the page shell renders meanwhile)."""
+    return _fetch_pool().submit(_fetch_record, REDCAP_API_URL, REDCAP_API_TOKEN, record_id)
+
+def _await_record(future: Future):
+    """Wait for a background fetch and return the record as dict (None on failure)."""
+    try:
+        with st.spinner("Fetching your responses…"):
+            return future.result()
+    except LookupError:
+        pass  # no such record (yet); handled by the caller
+    except requests.Timeout:
+        st.error("REDCap API request timed out. The server might be behind a firewall/VPN.")
+    except Exception as e:
+        st.exception(e)
+    return None
+
+# Kick off the fetch now (unless this session already holds the record); the CSS and QR code
+# below render while REDCap answers
+_stashed = st.session_state.get("_dm_record")
+_record_future = None if _stashed and _stashed[0] == record_id else fetch_by_record_id(record_id)
+
 # Shareable png starts now
 st.markdown('<div id="dm-share-card">', unsafe_allow_html=True)
 
@@ -47,10 +180,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- QR code (top-right inside page padding) ---
+@st.cache_data(show_spinner=False)
 def _data_uri(path: str) -> str:
+    """Static asset as a base64 data URI (encoded once, reused across reruns)."""
     mime = "image/svg+xml" if path.lower().endswith(".svg") else "image/png"
     with open(path, "rb") as f:
-        import base64
         b64 = base64.b64encode(f.read()).decode()
     return f"data:{mime};base64,{b64}"
 
@@ -83,9 +217,29 @@ st.markdown(
 # Global constants
 # ==============
 PURPLE_HEX = "#7C3AED"   # plots/polygons
+HL_RGB = tuple(int(PURPLE_HEX[1+i:3+i], 16) / 255.0 for i in (0, 2, 4))  # participant highlight
 PURPLE_NAME = "#7A5CFA"  # profile name
 CAP_MIN = 60.0           # sleep latency cap (minutes)
 ASSETS_CSV = os.path.join("assets", "N3100_comparative_viz_ready.csv")
+SCREEN_DPI = 150         # on-screen figure rasterisation (Streamlit default is 200)
+
+# Shared text styles for the small population plots (built once, reused by every ax.text)
+_FP_TITLE = FontProperties(size=8)
+_FP_NOTE  = FontProperties(size=7.5)
+
+
+def _fig_png(fig, **savefig_kwargs) -> bytes:
+    """Rasterise fig once at SCREEN_DPI, close it and return the PNG bytes."""
+    opts = {"format": "png", "dpi": SCREEN_DPI, "bbox_inches": "tight", **savefig_kwargs}
+    buf = io.BytesIO()
+    fig.savefig(buf, **opts)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def _show_fig(fig, **savefig_kwargs):
+    """Show fig as a PNG at column width."""
+    st.image(_fig_png(fig, **savefig_kwargs), width="stretch")
 
 
 # ==============
@@ -180,6 +334,9 @@ header[data-testid="stHeader"]::before { content: none; }
    =============================== */
 .dm2-outer { margin-left: -70px !important; width: 100%; }
 
+/* Live page: all rows share one markdown element — reproduce the 1rem element gaps */
+.dm2-stack { display: flex; flex-direction: column; gap: 1rem; margin: 1rem 0; }
+
 .dm2-row {
   display: grid;
   grid-template-columns: 160px 1fr;  /* label | bar */
@@ -778,41 +935,15 @@ html, body, [data-testid="stAppViewContainer"], [data-testid="stAppViewContainer
 """, unsafe_allow_html=True)
 
 
-# ==============
-# Data access
-# ==============
-def fetch_by_record_id(record_id: str):
-    """Fetch a single REDCap record as dict."""
-    payload = {
-        "token": REDCAP_API_TOKEN,
-        "content": "record",
-        "format": "json",
-        "type": "flat",
-        "records[0]": record_id,
-        "rawOrLabel": "raw",
-        "rawOrLabelHeaders": "raw",
-        "exportSurveyFields": "true",
-        "exportDataAccessGroups": "false",
-    }
-    try:
-        with st.spinner("Fetching your responses…"):
-            r = requests.post(REDCAP_API_URL, data=payload, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        return data[0] if data else None
-    except requests.Timeout:
-        st.error("REDCap API request timed out. The server might be behind a firewall/VPN.")
-    except Exception as e:
-        st.exception(e)
-    return None
-
 # ==============
 # Query param → record
 # ==============
-record = None
-record_id = st.query_params.get("id")
-if record_id:
-    record = fetch_by_record_id(record_id)
+if _record_future is None:
+    record = _stashed[1]
+else:
+    record = _await_record(_record_future)
+    if record:
+        st.session_state["_dm_record"] = (record_id, record)  # widget reruns skip the fetch
 if not record:
     st.error("We couldn’t find your responses.")
     st.stop()
@@ -849,23 +980,22 @@ q_it   = record.get("questionnaire_it_complete")   # Italian version
 def _strip_suffix_keep_first(rec, suffix, n_keep=5):
     """
     Keep the first n_keep columns as-is, and for all other columns
-    that end with the given suffix, remove the suffix.
+    that end with the given suffix, remove the suffix. A suffixed value
+    always wins over its unsuffixed column, wherever either one sits
+    (a fields[]-filtered export does not start with the metadata columns).
 
     Example:
       freq_mindwandering_fr -> freq_mindwandering
     """
     new_rec = {}
+    cut = len(suffix)
 
-    # Keep the first n_keep keys exactly as they are
-    keys = list(rec.keys())
-    for k in keys[:n_keep]:
-        new_rec[k] = rec[k]
-
-    # Add all suffixed questionnaire variables with suffix removed
-    for k, v in rec.items():
+    # One pass: the first n_keep keys as they are, suffixed variables with the suffix removed
+    for i, (k, v) in enumerate(rec.items()):
+        if i < n_keep and k + suffix not in rec:
+            new_rec[k] = v
         if k.endswith(suffix):
-            base = k[:-len(suffix)]
-            new_rec[base] = v
+            new_rec[k[:-cut]] = v
 
     return new_rec
 
@@ -887,6 +1017,10 @@ else:
     # do nothing, keep the original column names
     pass
 
+# Content hash of the normalized record: cheap, stable cache key for per-participant work
+record_sig = hashlib.blake2b(json.dumps(record, sort_keys=True, default=str).encode(),
+                             digest_size=16).hexdigest()
+
 
 # =====================================================
 # Language detection
@@ -1830,9 +1964,11 @@ def tr(key, **kwargs):
 # Normalization helpers
 # ==============
 def _to_float(x):
+    if type(x) is float:
+        return x
     try:
         return float(x)
-    except:
+    except (TypeError, ValueError, OverflowError):
         return np.nan
     
 def norm_bool(x): # For binary 0 / 1
@@ -1841,7 +1977,6 @@ def norm_bool(x): # For binary 0 / 1
     except:
         return np.nan
     
-import re
 def norm_eq(x, value):
     """
     Returns 1.0 if x equals `value` (tolerant to floats/strings/newlines),
@@ -1869,25 +2004,22 @@ def norm_eq(x, value):
         return np.nan
 
     
-def norm_1_4(x):
+def _norm_affine(x, lo, scale):
+    """(x - lo) / scale clipped to 0..1; NaN if x is not numeric."""
     x = _to_float(x)
     if np.isnan(x): return np.nan
-    return np.clip((x - 1.0) / 3.0, 0.0, 1.0)    
+    return max(0.0, min(1.0, (x - lo) / scale))
 
-def norm_1_6(x):
-    x = _to_float(x)
-    if np.isnan(x): return np.nan
-    return np.clip((x - 1.0) / 5.0, 0.0, 1.0)
-
-def norm_0_100(x):
-    x = _to_float(x)
-    if np.isnan(x): return np.nan
-    return np.clip(x / 100.0, 0.0, 1.0)
+norm_1_4   = functools.partial(_norm_affine, lo=1.0, scale=3.0)
+norm_1_6   = functools.partial(_norm_affine, lo=1.0, scale=5.0)
+norm_0_100 = functools.partial(_norm_affine, lo=0.0, scale=100.0)
+norm_1_100 = functools.partial(_norm_affine, lo=1.0, scale=99.0)
 
-def norm_1_100(x):
-    x = _to_float(x)
-    if np.isnan(x): return np.nan
-    return np.clip((x - 1.0) / 99.0, 0.0, 1.0)
+# Latency parsing: compiled once, unit → minutes multiplier
+_HHMM_RE = re.compile(r"^\s*(\d{1,2})\s*:\s*(\d{1,2})\s*$")
+_UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hour|hours|m|min|mins|minute|minutes)?")
+_UNIT_MULT = {**dict.fromkeys(("h", "hr", "hrs", "hour", "hours"), 60.0),
+              **dict.fromkeys(("m", "min", "mins", "minute", "minutes"), 1.0)}
 
 def _to_minutes_relaxed(x):
     """Accepts minutes, 'HH:MM', '1h05', '15', or 0..1 normalized; returns minutes or None if already normalized."""
@@ -1899,19 +2031,18 @@ def _to_minutes_relaxed(x):
     s = str(x).strip().lower()
     if s == "" or s in {"na", "n/a", "none"}: return np.nan
 
-    m = re.match(r"^\s*(\d{1,2})\s*:\s*(\d{1,2})\s*$", s)
+    m = _HHMM_RE.match(s)
     if m:
         hh, mm = int(m.group(1)), int(m.group(2))
         return float(hh * 60 + mm)
 
-    parts = re.findall(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hour|hours|m|min|mins|minute|minutes)?", s)
+    parts = _UNIT_RE.findall(s)
     if parts:
         total = 0.0; any_unit = False
         for val, unit in parts:
             if val == "": continue
-            v = float(val)
-            if unit in ("h","hr","hrs","hour","hours"): total += v * 60.0; any_unit = True
-            elif unit in ("m","min","mins","minute","minutes"): total += v; any_unit = True
+            mult = _UNIT_MULT.get(unit)
+            if mult is not None: total += float(val) * mult; any_unit = True
         if any_unit: return total
 
     try:
@@ -2213,16 +2344,13 @@ def _eval_condition(record, cond: dict) -> bool:
     raw = _get_first(record, keys)
 
     norm_fn = cond.get("norm")
-    kwargs = cond.get("norm_kwargs", {}) or {}
+    kwargs = cond.get("norm_kwargs")
 
     # Compute comparable value v (normalized if norm given, else raw float)
     if norm_fn is None:
         v = _to_float(raw)
     else:
-        try:
-            v = norm_fn(raw, **kwargs)
-        except TypeError:
-            v = norm_fn(raw)
+        v = norm_fn(raw, **kwargs) if kwargs else norm_fn(raw)
 
     if v is None:
         return False
@@ -2301,16 +2429,14 @@ def _feature_value_from_record(record, scores_unused, feat):
     raw = _get_first(record, keys)
 
     norm_fn = feat.get("norm")
-    kwargs = feat.get("norm_kwargs", {}) or {}
+    kwargs = feat.get("norm_kwargs")
 
     if norm_fn is None:
         v = _to_float(raw)
         if np.isnan(v): return np.nan
         return np.clip(v, 0.0, 1.0)
-    try:
-        return norm_fn(raw, **kwargs)
-    except TypeError:
-        return norm_fn(raw)
+    # every normalizer accepts its declared kwargs; only unpack when there are some
+    return norm_fn(raw, **kwargs) if kwargs else norm_fn(raw)
 
 
 def _weighted_nanaware_distance(values, targets, weights):
@@ -2389,124 +2515,79 @@ def _feature_hit(record, feat, value, tol=0.95):
 
 
 
-def assign_profile_from_record(record):
+# ---- Per-profile target/weight arrays (PROFILES is static: built once) --------
+_PROFILE_ARRAYS = {
+    name: (np.array([float(f.get("target", np.nan)) for f in cfg["features"]]),
+           np.array([float(f.get("weight", 1.0)) for f in cfg["features"]]))
+    for name, cfg in PROFILES.items() if cfg.get("features")
+}
+
+
+def _profile_scores(record):
     """
-    For each profile, compute a weighted distance using only 'var' features.
-    Returns (best_profile_name, {}).
+    One pass over all profiles: {name: (distance, hit_ratio)} for every profile
+    that passes its must/veto guards, in PROFILES order. Shared by the profile
+    assignment and the likelihood distances so both always agree.
     """
-    scores = {}  # kept for compatibility with caller
-    best_name, best_dist, best_r = None, np.inf, -1.0
-
     # AND-ish knobs:
     K_RATIO = 0.20   # need ~60% of eligible criteria to be met
     GAMMA   = 0.8    # >1 increases penalty steepness
     CAP     = 3.0    # max multiplicative penalty
 
-    for name, cfg in PROFILES.items():
-        feats = cfg.get("features", [])
-        if not feats:
-            continue
-        
-        # NEW — pre-filter by must/veto
+    out = {}
+    for name, (targs, wts) in _PROFILE_ARRAYS.items():
+        cfg = PROFILES[name]
+
+        # Pre-filter by must/veto
         if any(not _eval_guard(record, r) for r in cfg.get("must", [])):   # fails any must → skip
             continue
         if any(_eval_guard(record, r) for r in cfg.get("veto", [])):       # triggers any veto → skip
             continue
 
-        vals, targs, wts = [], [], []
-        hits, eligible = 0, 0
-        tmp_vals = []
-
-        for f in feats:
-            # 1️⃣ Compute the feature value (as you already did)
-            v   = _feature_value_from_record(record, scores, f)
-            tgt = float(f.get("target", np.nan))
-            wt  = float(f.get("weight", 1.0))
-            vals.append(v)
-            targs.append(tgt)
-            wts.append(wt)
-            tmp_vals.append((f, v))
-
-            # 2️⃣ New eligibility-aware hit logic
-            h = _feature_hit(record, f, v)   # ← uses the new version below
-            if h is not None:
-                eligible += 1
-                hits += int(h)
+        feats = cfg["features"]
+        vals = np.fromiter((_feature_value_from_record(record, None, f) for f in feats),
+                           dtype=float, count=len(feats))
+
+        # Eligibility-aware hits (None = ineligible, doesn't count)
+        hit_flags = [h for h in (_feature_hit(record, f, v) for f, v in zip(feats, vals)) if h is not None]
+        eligible, hits = len(hit_flags), sum(hit_flags)
 
         # --- per-feature distance (RMSE) so fewer-criteria profiles aren't advantaged
         d = _weighted_nanaware_distance(vals, targs, wts)
 
         # --- AND-ish: smooth proportional penalty based on fraction hit, capped
-        if eligible > 0:
-            r = hits / float(eligible)
-            if r < K_RATIO:
-                penalty = (K_RATIO / max(r, 1e-6)) ** GAMMA
-                d *= min(penalty, CAP)
-
-        # --- keep best — break near-ties by favoring higher hit ratio
-        r = (hits / float(eligible)) if eligible > 0 else 0.0
-        EPS = 1e-6
-        if (d + EPS) < best_dist or (abs(d - best_dist) <= EPS and r > best_r):
-            best_name, best_dist, best_r = name, d, r
+        r = hits / float(eligible) if eligible > 0 else 0.0
+        if eligible > 0 and r < K_RATIO:
+            penalty = (K_RATIO / max(r, 1e-6)) ** GAMMA
+            d *= min(penalty, CAP)
 
-    return best_name, scores
+        out[name] = (d, r)
+    return out
 
 
-def compute_profile_distances(record):
+def assign_profile_from_record(record):
     """
-    Compute the same AND-ish, weighted distance used in assign_profile_from_record,
-    but return a dict of distances for ALL eligible profiles.
+    For each profile, compute a weighted distance using only 'var' features.
+    Returns (best_profile_name, {}).
     """
-    scores = {}
-    dists = {}
-
-    # Must match assign_profile_from_record
-    K_RATIO = 0.20
-    GAMMA   = 0.8
-    CAP     = 3.0
-
-    for name, cfg in PROFILES.items():
-        feats = cfg.get("features", [])
-        if not feats:
-            continue
-
-        # Apply must/veto filtering to match assign_profile_from_record
-        if any(not _eval_guard(record, r) for r in cfg.get("must", [])):
-            continue
-        if any(_eval_guard(record, r) for r in cfg.get("veto", [])):
-            continue
+    scores = {}  # kept for compatibility with caller
+    best_name, best_dist, best_r = None, np.inf, -1.0
 
-        vals, targs, wts = [], [], []
-        hits, eligible = 0, 0
-        tmp_vals = []
-
-        for f in feats:
-            v   = _feature_value_from_record(record, scores, f)
-            tgt = float(f.get("target", np.nan))
-            wt  = float(f.get("weight", 1.0))
-            vals.append(v)
-            targs.append(tgt)
-            wts.append(wt)
-            tmp_vals.append((f, v))
-
-            # Same eligibility-aware hit logic
-            h = _feature_hit(record, f, v)
-            if h is not None:
-                eligible += 1
-                hits += int(h)
-
-        # Same distance as in assign_profile_from_record
-        d = _weighted_nanaware_distance(vals, targs, wts)
+    # --- keep best — break near-ties by favoring higher hit ratio
+    EPS = 1e-6
+    for name, (d, r) in _profile_scores(record).items():
+        if (d + EPS) < best_dist or (abs(d - best_dist) <= EPS and r > best_r):
+            best_name, best_dist, best_r = name, d, r
 
-        if eligible > 0:
-            r = hits / float(eligible)
-            if r < K_RATIO:
-                penalty = (K_RATIO / max(r, 1e-6)) ** GAMMA
-                d *= min(penalty, CAP)
+    return best_name, scores
 
-        dists[name] = d
 
-    return dists
+def compute_profile_distances(record):
+    """
+    Same AND-ish, weighted distance used in assign_profile_from_record,
+    as a dict of distances for ALL eligible profiles.
+    """
+    return {name: d for name, (d, _) in _profile_scores(record).items()}
 
 
 
@@ -2529,6 +2610,16 @@ def _eval_guard(record, rule):
     # single condition
     return _eval_condition(record, rule)
 
+
+# ---- Cached entry points (keyed on record_sig; the dict itself is not hashed) ----
+@st.cache_data(show_spinner=False)
+def _cached_profile(record_sig, _record):
+    return assign_profile_from_record(_record)
+
+@st.cache_data(show_spinner=False)
+def _cached_profile_distances(record_sig, _record):
+    return compute_profile_distances(_record)
+
 # =========
 # Plurals for profile names (FR) and group phrases (ES)
 # =========
@@ -2566,12 +2657,6 @@ PROFILE_ARTICLE_ES = {
 # ==============
 # Title + Profile header (icon + text)
 # ==============
-def _data_uri(path: str) -> str:
-    mime = "image/svg+xml" if path.lower().endswith(".svg") else "image/png"
-    with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode()
-    return f"data:{mime};base64,{b64}"
-
 # Title
 st.markdown(f"""
 <div class="dm-center">
@@ -2582,7 +2667,7 @@ st.markdown(f"""
 
 
 # Assign profile + get text/icon
-prof_name, scores = assign_profile_from_record(record)
+prof_name, scores = _cached_profile(record_sig, record)
 prof_cfg = PROFILES.get(prof_name, {})
 icon_file = prof_cfg.get("icon")
 icon_path = f"assets/{icon_file}" if icon_file else None
@@ -2727,15 +2812,12 @@ DIM_BAR_CONFIG = {
 
 def _get(record, key, default=np.nan): return record.get(key, default)
 
-def _norm16(x):
-    try: v = float(x)
-    except: return np.nan
-    if np.isnan(v): return np.nan
-    return np.clip((v - 1.0) / 5.0, 0.0, 1.0)
+_norm16 = norm_1_6
 
 def _mean_ignore_nan(arr):
-    arr = [a for a in arr if not (isinstance(a, float) and np.isnan(a))]
-    return np.nan if len(arr) == 0 else float(np.mean(arr))
+    a = np.asarray(arr, dtype=float)
+    a = a[~np.isnan(a)]  # not np.nanmean: it warns on all-NaN input
+    return float(a.mean()) if a.size else np.nan
 
 def _weight_boost(wvals, mode: str):
     w = _mean_ignore_nan([_norm16(v) for v in wvals])
@@ -2763,51 +2845,113 @@ def compute_dimension_score(record, cfg, k_bump=0.8):
     return float(np.clip(base + bump, 0.0, 1.0))
 
 # Load population once (for bars + later plots)
+@st.cache_data(show_spinner=False)
+def _load_population(path: str) -> pd.DataFrame:
+    """Population table (parsed once per process; callers get their own copy)."""
+    return pd.read_csv(path)
+
+# Numeric population columns read by the plots below
+_POP_NUMERIC_COLS = ("creativity_trait", "anxiety", "chronotype", "dream_recall")
+
+@st.cache_data(show_spinner=False)
+def _population_numeric(path: str) -> dict:
+    """{column: float64 array} for _POP_NUMERIC_COLS + sleep-latency columns (coerced once per process)."""
+    df = _load_population(path)
+    cols = [c for c in df.columns if c in _POP_NUMERIC_COLS or "sleep_latency" in c.lower()]
+    return {c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float) for c in cols}
+
 try:
-    pop_data = pd.read_csv(ASSETS_CSV)
+    pop_data = _load_population(ASSETS_CSV)
+    pop_num = _population_numeric(ASSETS_CSV)
 except Exception as e:
     st.error(f"Could not load population data at {ASSETS_CSV}: {e}")
-    pop_data = None
+    pop_data, pop_num = None, {}
+
+@st.cache_data(show_spinner=False)
+def _cached_dim_bars(record_sig, _record, k_bump=0.8):
+    """Participant bar scores (0..100 or None), keyed on record_sig like _cached_profile."""
+    bars = []
+    for name, cfg in DIM_BAR_CONFIG.items():
+        s01 = compute_dimension_score(_record, cfg, k_bump=k_bump)
+        s100 = None if (isinstance(s01, float) and np.isnan(s01)) else float(s01 * 100.0)
+        bars.append({"name": name, "help": cfg["help"], "score": s100})
+    return bars
+
+bars = _cached_dim_bars(record_sig, record)
+
+def _norm16_cols(df: pd.DataFrame, keys) -> np.ndarray:
+    """(len(keys), len(df)) array of 1..6 answers mapped to 0..1 (missing column/value → NaN)."""
+    out = np.full((len(keys), len(df)), np.nan)
+    for i, k in enumerate(keys):
+        if k in df.columns:
+            out[i] = np.clip((pd.to_numeric(df[k], errors="coerce").to_numpy(dtype=float) - 1.0) / 5.0,
+                             0.0, 1.0)
+    return out
+
+def _nanmean_rows(a: np.ndarray) -> np.ndarray:
+    """Column-wise mean over the rows of a, ignoring NaN (all-NaN → NaN, no warning)."""
+    n = np.sum(~np.isnan(a), axis=0)
+    return np.divide(np.nansum(a, axis=0), n, out=np.full(a.shape[1], np.nan), where=n > 0)
+
+def _dimension_scores_vec(df: pd.DataFrame, cfg, k_bump=0.8) -> np.ndarray:
+    """compute_dimension_score for every row of df at once (NaN where the base is missing)."""
+    vals = _norm16_cols(df, cfg["freq_keys"])
+    inv = [i for i, k in enumerate(cfg["freq_keys"]) if k in cfg.get("invert_keys", [])]
+    vals[inv] = 1.0 - vals[inv]
+    base = _nanmean_rows(vals)
+
+    w = _nanmean_rows(_norm16_cols(df, cfg["weight_keys"]))
+    w = np.where(np.isnan(w), 0.5, w)
+    if cfg.get("weight_mode", "standard") == "emotion_bipolar":
+        boost = np.maximum(0.0, 2.0 * np.abs(w - 0.5) - 0.5)
+    else:
+        boost = np.maximum(0.0, w - 0.5)
+    boost = np.clip(boost, 0.0, 0.5)
 
-bars = []
-for name, cfg in DIM_BAR_CONFIG.items():
-    s01 = compute_dimension_score(record, cfg, k_bump=0.8)
-    s100 = None if (isinstance(s01, float) and np.isnan(s01)) else float(s01 * 100.0)
-    bars.append({"name": name, "help": cfg["help"], "score": s100})
+    bump = k_bump * boost * base * (1.0 - base)
+    return np.clip(base + bump, 0.0, 1.0)
 
 def compute_population_distributions(df: pd.DataFrame, dim_config: dict, k_bump=0.8):
     if df is None or df.empty: return {}
-    dist = {name: [] for name in dim_config.keys()}
-    for _, row in df.iterrows():
-        rec = row.to_dict()
-        for nm, cfg in dim_config.items():
-            s = compute_dimension_score(rec, cfg, k_bump=k_bump)
-            if not (isinstance(s, float) and np.isnan(s)):
-                dist[nm].append(float(np.clip(s * 100.0, 0.0, 100.0)))
-    for nm in dist:
-        arr = np.array(dist[nm], dtype=float)
-        dist[nm] = arr[~np.isnan(arr)]
+    dist = {}
+    for nm, cfg in dim_config.items():
+        s = _dimension_scores_vec(df, cfg, k_bump=k_bump)
+        dist[nm] = np.clip(s[~np.isnan(s)] * 100.0, 0.0, 100.0)
     return dist
 
-pop_dists = compute_population_distributions(pop_data, DIM_BAR_CONFIG, k_bump=0.8)
-pop_medians = {k: (float(np.nanmedian(v)) if (isinstance(v, np.ndarray) and v.size) else None)
-               for k, v in pop_dists.items()}
+@st.cache_data(show_spinner=False)
+def _population_dim_stats(path: str, k_bump: float = 0.8):
+    """Population bar distributions + medians (static asset: computed once per process)."""
+    dists = compute_population_distributions(_load_population(path), DIM_BAR_CONFIG, k_bump=k_bump)
+    medians = {k: (float(np.nanmedian(v)) if (isinstance(v, np.ndarray) and v.size) else None)
+               for k, v in dists.items()}
+    return dists, medians
+
+pop_dists, pop_medians = _population_dim_stats(ASSETS_CSV) if pop_data is not None else ({}, {})
 
 # Render bars (unchanged visuals)
-st.markdown("<div class='dm2-outer'><div class='dm2-bars'>", unsafe_allow_html=True)
 
 def _clamp_pct(p, lo=2.0, hi=98.0):
-    try: p = float(p)
-    except: return lo
-    return max(lo, min(hi, p))
+    return max(lo, min(hi, float(p)))  # p is always numeric here
+
+# tr() keys of the two end labels per bar (from "left ↔ right" help text; None → 0/100)
+def _bar_anchor_keys(help_txt):
+    if not (isinstance(help_txt, str) and "↔" in help_txt):
+        return None
+    raw_left, raw_right = [s.strip() for s in help_txt.split("↔", 1)]
+    return (raw_left if raw_left != "Vivid" else "Vivid_anchor",
+            raw_right if raw_right not in {"Vivid", "Bizarre", "Immersive", "Spontaneous"}
+            else raw_right + "_anchor")
+
+_BAR_ANCHOR_KEYS = {name: _bar_anchor_keys(cfg["help"]) for name, cfg in DIM_BAR_CONFIG.items()}
 
 min_fill = 2  # minimal % fill for aesthetic continuity
 world_tag = tr("WORLD_AVERAGE_TAG")   # ⟵ ajoute cette ligne une fois avant la boucle
 
+bar_rows = []
 for b in bars:
     name = b["name"]
     display_name = tr(name)
-    help_txt = b["help"]
     score = b["score"]
     median = pop_medians.get(name, None)
 
@@ -2822,16 +2966,8 @@ for b in bars:
     else:
         med_left = float(np.clip(median, 0, 100)); med_left_clamped = _clamp_pct(med_left)
 
-        if isinstance(help_txt, str) and "↔" in help_txt:
-            raw_left, raw_right = [s.strip() for s in help_txt.split("↔", 1)]
-            left_anchor  = tr(raw_left if raw_left != "Vivid" else "Vivid_anchor")
-            right_anchor = tr(
-                raw_right if raw_right not in {"Vivid", "Bizarre", "Immersive", "Spontaneous"}
-                else raw_right + "_anchor"
-                )
-        else:
-            left_anchor, right_anchor = "0", "100"
-
+    anchor_keys = _BAR_ANCHOR_KEYS.get(name)
+    left_anchor, right_anchor = ("0", "100") if anchor_keys is None else map(tr, anchor_keys)
 
     median_html = "" if med_left is None else f"<div class='dm2-median' style='left:{med_left}%;'></div>"
 
@@ -2865,9 +3001,10 @@ for b in bars:
           "</div>"
         "</div>"
     )
-    st.markdown(row_html, unsafe_allow_html=True)
+    bar_rows.append(row_html)
 
-st.markdown("</div></div>", unsafe_allow_html=True)
+# One element for all rows; .dm2-stack keeps the spacing the per-row elements had
+st.markdown("<div class='dm2-stack'>" + "".join(bar_rows) + "</div>", unsafe_allow_html=True)
 
 
 
@@ -3441,25 +3578,7 @@ st.markdown(
 
 
 
-# --- Color setup -------------------------------------------------------------
-_HL = None
-for name in ["PURPLE_HEX", "DM_PURPLE", "SLEEP_COLOR", "COLOR_PURPLE", "ACCENT_PURPLE"]:
-    if name in globals():
-        _HL = globals()[name]
-        break
-if not _HL:
-    _HL = "#6F45FF"
-
-def _hex_to_rgb_tuple(h):
-    h = h.lstrip("#")
-    return tuple(int(h[i:i+2], 16)/255.0 for i in (0, 2, 4))
-HL_RGB = _hex_to_rgb_tuple(_HL)
-
 # --- Helpers -----------------------------------------------------------------
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from scipy.stats import truncnorm
 
 def _mini_hist(ax, counts, edges, highlight_idx, title, bar_width_factor=0.95):
     centers = 0.5 * (edges[:-1] + edges[1:])
@@ -3473,7 +3592,7 @@ def _mini_hist(ax, counts, edges, highlight_idx, title, bar_width_factor=0.95):
                color=HL_RGB, edgecolor="white", align="center")
 
     # title
-    ax.set_title(title, fontsize=8, pad=6, color="#222222")
+    ax.set_title(title, fontproperties=_FP_TITLE, pad=6, color="#222222")
 
     # x-axis baseline and labels
     ax.spines["bottom"].set_linewidth(0.3)
@@ -3487,16 +3606,11 @@ def _mini_hist(ax, counts, edges, highlight_idx, title, bar_width_factor=0.95):
     ax.margins(y=0)
 
 
-def _col_values(df, colname):
-    if df is None or df.empty or (colname not in df.columns):
-        return np.array([])
-    return pd.to_numeric(df[colname], errors="coerce").to_numpy()
+def _col_values(colname):
+    return pop_num.get(colname, np.array([]))
 
 def _participant_value(rec, key):
-    try:
-        return float(str(rec.get(key, np.nan)).strip())
-    except Exception:
-        return np.nan
+    return _to_float(rec.get(key, np.nan))  # float() itself ignores surrounding whitespace
 
 # --- Data prep ---------------------------------------------------------------
 
@@ -3504,32 +3618,32 @@ def _participant_value(rec, key):
 try:
     vviq_score
 except NameError:
-    VVIQ_FIELDS = [
-        "quest_a1","quest_a2","quest_a3","quest_a4",
-        "quest_b1","quest_b2","quest_b3","quest_b4",
-        "quest_c1","quest_c2","quest_c3","quest_c4",
-        "quest_d1","quest_d2","quest_d3","quest_d4"
-    ]
-    vviq_vals  = [float(record.get(k, np.nan)) if pd.notna(record.get(k, np.nan)) else np.nan for k in VVIQ_FIELDS]
+    vviq_vals  = [_to_float(record.get(k, np.nan)) for k in VVIQ_FIELDS]
     vviq_score = sum(v for v in vviq_vals if np.isfinite(v))
 
-N = 8000; mu, sigma = 61.0, 9.2; low, high = 30, 80
-a, b = (low - mu) / sigma, (high - mu) / sigma
-vviq_samples = truncnorm.rvs(a, b, loc=mu, scale=sigma, size=N, random_state=42)
-vviq_edges   = np.linspace(low, high, 26)
-vviq_counts, _ = np.histogram(vviq_samples, bins=vviq_edges, density=True)
-vviq_hidx = int(np.clip(np.digitize(vviq_score, vviq_edges) - 1, 0, len(vviq_counts)-1))
+@st.cache_data(show_spinner=False)
+def _vviq_reference_hist(edges: np.ndarray, mu=61.0, sigma=9.2, low=30, high=80, n=8000, seed=42):
+    """Density histogram of the VVIQ reference sample (truncated normal, fixed seed: drawn once)."""
+    from scipy.stats import truncnorm  # lazy: scipy only loads on a cache miss
+    a, b = (low - mu) / sigma, (high - mu) / sigma
+    samples = truncnorm.rvs(a, b, loc=mu, scale=sigma, size=n, random_state=seed)
+    counts, _ = np.histogram(samples, bins=edges, density=True)
+    return counts
+
+vviq_edges  = np.linspace(16, 80, 22)  # 16 → 80
+vviq_counts = _vviq_reference_hist(vviq_edges)
+vviq_hidx   = int(np.clip(np.digitize(vviq_score, vviq_edges) - 1, 0, len(vviq_counts) - 1))
 
 
 # 2) Creativity 1–6
-cre_vals  = _col_values(pop_data, "creativity_trait")
+cre_vals  = _col_values("creativity_trait")
 cre_edges = np.arange(0.5, 6.5 + 1.0, 1.0)
 cre_counts, _ = np.histogram(cre_vals, bins=cre_edges, density=True) if cre_vals.size else (np.array([]), cre_edges)
 cre_part  = _participant_value(record, "creativity_trait")
 cre_hidx  = int(np.clip(np.digitize(cre_part, cre_edges) - 1, 0, len(cre_counts)-1)) if cre_counts.size else 0
 
 # 3) Anxiety 1–100, 10-point bins  ← fewer bins
-anx_vals  = _col_values(pop_data, "anxiety")
+anx_vals  = _col_values("anxiety")
 anx_edges = np.arange(0.5, 100.5 + 10, 10)  # 0.5 → 110.5, step 10 → ~10 bins
 anx_counts, _ = np.histogram(anx_vals, bins=anx_edges, density=True) if anx_vals.size else (np.array([]), anx_edges)
 anx_part  = _participant_value(record, "anxiety")
@@ -3540,41 +3654,37 @@ anx_hidx  = int(np.clip(np.digitize(anx_part, anx_edges) - 1, 0, len(anx_counts)
 FIGSIZE_IMAGERY  = (2.4, 2.60)
 FIGSIZE_STANDARD = (2.4, 2.60)
 
-c1, c2, c3 = st.columns(3, gap="small")
-
-with c1:
+@st.cache_data(show_spinner=False)
+def _vviq_png(counts: np.ndarray, edges: np.ndarray, hidx: int, vviq_score: float, title: str,
+              low_lbl: str, high_lbl: str, you_lbl: str, world_lbl: str) -> bytes:
+    """Imagery histogram as PNG bytes (rendered once per score/language)."""
     fig, ax = plt.subplots(figsize=FIGSIZE_IMAGERY)
     fig.patch.set_alpha(0)
     ax.set_facecolor("none")
 
-    # --- Rebuild histogram so x starts at 16 ---------------------------------
-    vviq_edges = np.linspace(16, 80, 22)  # 16 → 80
-    vviq_counts, _ = np.histogram(vviq_samples, bins=vviq_edges, density=True)
-    vviq_hidx = int(np.clip(np.digitize(vviq_score, vviq_edges) - 1, 0, len(vviq_counts) - 1))
-
     # --- Plot imagery histogram ----------------------------------------------
     _mini_hist(
         ax,
-        vviq_counts,
-        vviq_edges,
-        vviq_hidx,
-        tr("Your visual imagery at wake: {val}", val=int(round(vviq_score)))
+        counts,
+        edges,
+        hidx,
+        title
     )
 
     # --- Custom x-axis labels -------------------------------------------------
-    ax.text(0.00, -0.05, f"{tr('low')} (16)",   transform=ax.transAxes,
-        ha="left",  va="top", fontsize=7.5)
-    ax.text(1.00, -0.05, f"{tr('high')} (80)", transform=ax.transAxes,
-        ha="right", va="top", fontsize=7.5)
+    ax.text(0.00, -0.05, f"{low_lbl} (16)",   transform=ax.transAxes,
+        ha="left",  va="top", fontproperties=_FP_NOTE)
+    ax.text(1.00, -0.05, f"{high_lbl} (80)", transform=ax.transAxes,
+        ha="right", va="top", fontproperties=_FP_NOTE)
+
 
-    
     # --- Optional vertical marker for very low imagery (<30) -----------------
     if vviq_score < 35:
         x_line = vviq_score
         # short vertical segment (20% of current y max)
         y_max = ax.get_ylim()[1]
         ax.vlines(x_line, 0, y_max * 0.2, color=PURPLE_HEX, lw=1.2)
-    
+
 
     # --- In-axes minimalist legend (left, mid-height) ------------------------
     x0 = 0.02
@@ -3587,27 +3697,32 @@ with c1:
                                box_size, box_size,
                                transform=ax.transAxes,
                                color=PURPLE_HEX, lw=0))
-    ax.text(x0 + 0.05, y_top, tr("you"),
+    ax.text(x0 + 0.05, y_top, you_lbl,
             transform=ax.transAxes, ha="left", va="center",
-            fontsize=7.5, color=PURPLE_HEX)
+            fontproperties=_FP_NOTE, color=PURPLE_HEX)
 
     # world (gray square)
     ax.add_patch(plt.Rectangle((x0, y_top - y_gap - box_size / 2),
                                box_size, box_size,
                                transform=ax.transAxes,
                                color="#D9D9D9", lw=0))
-    ax.text(x0 + 0.05, y_top - y_gap, tr("world"),
+    ax.text(x0 + 0.05, y_top - y_gap, world_lbl,
             transform=ax.transAxes, ha="left", va="center",
-            fontsize=7.5, color="#444444")
+            fontproperties=_FP_NOTE, color="#444444")
 
     # maintain alignment
     ax.set_position(AX_POS_YOU)
-    import io
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', dpi=180, bbox_inches=None, pad_inches=0)
-    buf.seek(0)
-    st.image(buf, use_container_width=True)
-    plt.close(fig)
+    return _fig_png(fig, bbox_inches=None, pad_inches=0)
+
+
+c1, c2, c3 = st.columns(3, gap="small")
+
+with c1:
+    st.image(_vviq_png(
+        vviq_counts, vviq_edges, vviq_hidx, vviq_score,
+        tr("Your visual imagery at wake: {val}", val=int(round(vviq_score))),
+        tr("low"), tr("high"), tr("you"), tr("world"),
+    ), width="stretch")
 
 
 
@@ -3628,15 +3743,11 @@ with c2:
         )
         # Replace default x-labels
         ax.text(0.0, -0.05, f"{tr('low')} (1)",  transform=ax.transAxes,
-                ha="left", va="top", fontsize=7.5)
+                ha="left", va="top", fontproperties=_FP_NOTE)
         ax.text(1.0, -0.05, f"{tr('high')} (6)", transform=ax.transAxes,
-                ha="right", va="top", fontsize=7.5)
+                ha="right", va="top", fontproperties=_FP_NOTE)
         ax.set_position(AX_POS_YOU)  # ← lock baseline
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=180, bbox_inches=None, pad_inches=0)
-        buf.seek(0)
-        st.image(buf, use_container_width=True)
-        plt.close(fig)
+        _show_fig(fig, bbox_inches=None, pad_inches=0)
 
 
 with c3:
@@ -3655,15 +3766,11 @@ with c3:
         )
         # Replace default x-labels
         ax.text(0.0, -0.05, f"{tr('low')} (1)",  transform=ax.transAxes,
-                ha="left", va="top", fontsize=7.5)
+                ha="left", va="top", fontproperties=_FP_NOTE)
         ax.text(1.0, -0.05, f"{tr('high')} (100)", transform=ax.transAxes,
-                ha="right", va="top", fontsize=7.5)
+                ha="right", va="top", fontproperties=_FP_NOTE)
         ax.set_position(AX_POS_YOU)  # ← lock baseline
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', dpi=180, bbox_inches=None, pad_inches=0)
-        buf.seek(0)
-        st.image(buf, use_container_width=True)
-        plt.close(fig)
+        _show_fig(fig, bbox_inches=None, pad_inches=0)
 
 # --- Explanatory note below the three histograms ----------------------------
 st.markdown(
@@ -3712,11 +3819,97 @@ st.markdown(
 
 
 
+@st.cache_resource(show_spinner=False)
+def _latency_kde(samples: np.ndarray, x_max: float, n: int = 400):
+    """Gaussian KDE (Scott bandwidth) of samples and its curve on [0, x_max]; fitted once per sample set."""
+    from scipy.stats import gaussian_kde  # lazy: scipy only loads on a cache miss
+    kde = gaussian_kde(samples, bw_method="scott")
+    xs = np.linspace(0, x_max, n)
+    return kde, xs, kde(xs)
+
+@st.cache_data(show_spinner=False)
+def _latency_png(samples: np.ndarray, part_display: float, title: str,
+                 minutes_lbl: str, you_lbl: str, world_lbl: str) -> bytes:
+    """Latency KDE with the participant marker as PNG bytes (rendered once per input set)."""
+    kde, xs, ys = _latency_kde(samples, CAP_MIN)
+
+    with plt.rc_context({
+        "axes.facecolor": "none",
+        "axes.edgecolor": "#000000",
+        "axes.linewidth": 0.3,
+        "xtick.color": "#333333",
+        "ytick.color": "#333333",
+        "font.size": 7.5,
+    }):
+        fig, ax = plt.subplots(figsize=(2.2, 2.52))
+        fig.patch.set_alpha(0.0)
+        ax.set_facecolor("none")
+
+        # Match typography style of latency plot
+        ax.tick_params(axis="x", labelsize=7.5, labelcolor="#333333")
+        for label in ax.get_xticklabels():
+            label.set_fontweight("regular")    # ensure non-bold tick labels
+        ax.set_xlabel("hours", fontsize=7.5, color="#333333", fontweight="regular")
+
+        # KDE area
+        ax.fill_between(xs, ys, color="#e6e6e6", linewidth=0)
+
+        # Participant marker (line capped to KDE height)
+        y_part = float(kde([part_display])[0])
+        ax.vlines(part_display, 0, y_part, lw=0.8, color="#222222")
+        ax.scatter([part_display], [y_part], s=28, zorder=3,
+                   color=PURPLE_HEX, edgecolors="none")
+
+        # Titles & labels
+        ax.set_title(
+            title,
+            fontproperties=_FP_TITLE, pad=6, color="#222222"
+        )                        
+        ax.set_xlabel(minutes_lbl, fontsize=7.5, color="#333333")
+
+        # Remove y-axis
+        ax.set_ylabel("")
+        ax.get_yaxis().set_visible(False)
+        for side in ("left", "right", "top"):
+            ax.spines[side].set_visible(False)
+            ax.spines["bottom"].set_linewidth(0.3)   # thinner x-axis
+
+
+        # --- Add legend (right side, mid-height) ---------------------------------
+        x0 = 0.72     # further to the right inside axes (0–1 in Axes coords)
+        y_top = 0.73  # vertical position for first label
+        y_gap = 0.085
+        size = 0.038  # symbol size (same scale as imagery legend)
+
+        # "you" — purple circle
+        circle = plt.Circle((x0 + size/2, y_top), size/2,
+                            transform=ax.transAxes, color=PURPLE_HEX, lw=0)
+        ax.add_patch(circle)
+        ax.text(x0 + 0.05, y_top, you_lbl, transform=ax.transAxes,
+                ha="left", va="center", fontproperties=_FP_NOTE, color=PURPLE_HEX)
+
+        # "world" — gray square below
+        ax.add_patch(plt.Rectangle((x0, y_top - y_gap - size / 2),
+                                   size, size,
+                                   transform=ax.transAxes,
+                                   color="#D9D9D9", lw=0))
+        ax.text(x0 + 0.05, y_top - y_gap, world_lbl,
+                transform=ax.transAxes, ha="left", va="center",
+                fontproperties=_FP_NOTE, color="#444444")
+
+
+        xticks = np.linspace(0, CAP_MIN, 7)
+        ax.set_xticks(xticks)
+        xlabels = [str(int(t)) if t < CAP_MIN else "60+" for t in xticks]
+        ax.set_xticklabels(xlabels)
+        ax.tick_params(axis="x", labelsize=8, color="#333333")
+        plt.tight_layout()
+        ax.set_position(AX_POS_SLEEP)  # ← lock baseline
+        return _fig_png(fig)
+
 # --- Three-column layout -----------------------------------------------------
 col_left, col_mid, col_right = st.columns(3, gap="small")
 
-from scipy.stats import gaussian_kde
-
 # =============================================================================
 # LEFT: Sleep latency KDE (capped line height)
 # =============================================================================
@@ -3729,11 +3922,11 @@ with col_left:
             st.info("No sleep latency column in population data.")
         else:
             lat_col = lat_cols[0]
-            raw = pd.to_numeric(pop_data[lat_col], errors="coerce").dropna()
-            if raw.empty:
+            raw = pop_num[lat_col][~np.isnan(pop_num[lat_col])]
+            if raw.size == 0:
                 st.info("No valid population sleep-latency values.")
             else:
-                samples = np.clip(raw.values * CAP_MIN if raw.max() <= 1.5 else raw.values, 0, CAP_MIN)
+                samples = np.clip(raw * CAP_MIN if raw.max() <= 1.5 else raw, 0, CAP_MIN)
                 raw_sl = _get_first(record, ["sleep_latency"])
                 sl_norm = norm_latency_auto(raw_sl, cap_minutes=CAP_MIN)
                 if np.isnan(sl_norm):
@@ -3747,85 +3940,54 @@ with col_left:
                     part_display = float(np.clip(part_display, 0, CAP_MIN))
                     rounded_raw = int(round(part_raw_minutes)) if np.isfinite(part_raw_minutes) else int(round(part_display))
 
-                    kde = gaussian_kde(samples, bw_method="scott")
-                    xs = np.linspace(0, CAP_MIN, 400)
-                    ys = kde(xs)
-
-                    from matplotlib.ticker import MaxNLocator
-                    with plt.rc_context({
-                        "axes.facecolor": "none",
-                        "axes.edgecolor": "#000000",
-                        "axes.linewidth": 0.3,
-                        "xtick.color": "#333333",
-                        "ytick.color": "#333333",
-                        "font.size": 7.5,
-                    }):
-                        fig, ax = plt.subplots(figsize=(2.2, 2.52))
-                        fig.patch.set_alpha(0.0)
-                        ax.set_facecolor("none")
-                        
-                        # Match typography style of latency plot
-                        ax.tick_params(axis="x", labelsize=7.5, labelcolor="#333333")
-                        for label in ax.get_xticklabels():
-                            label.set_fontweight("regular")    # ensure non-bold tick labels
-                        ax.set_xlabel("hours", fontsize=7.5, color="#333333", fontweight="regular")
-
-                        # KDE area
-                        ax.fill_between(xs, ys, color="#e6e6e6", linewidth=0)
-
-                        # Participant marker (line capped to KDE height)
-                        y_part = float(kde([part_display])[0])
-                        ax.vlines(part_display, 0, y_part, lw=0.8, color="#222222")
-                        ax.scatter([part_display], [y_part], s=28, zorder=3,
-                                   color=PURPLE_HEX, edgecolors="none")
-
-                        # Titles & labels
-                        ax.set_title(
-                            tr("You fall asleep in {val} minutes", val=rounded_raw),
-                            fontsize=8, pad=6, color="#222222"
-                        )                        
-                        ax.set_xlabel(tr("minutes"), fontsize=7.5, color="#333333")
-
-                        # Remove y-axis
-                        ax.set_ylabel("")
-                        ax.get_yaxis().set_visible(False)
-                        for side in ("left", "right", "top"):
-                            ax.spines[side].set_visible(False)
-                            ax.spines["bottom"].set_linewidth(0.3)   # thinner x-axis
-
-                            
-                        # --- Add legend (right side, mid-height) ---------------------------------
-                        x0 = 0.72     # further to the right inside axes (0–1 in Axes coords)
-                        y_top = 0.73  # vertical position for first label
-                        y_gap = 0.085
-                        size = 0.038  # symbol size (same scale as imagery legend)
-                        
-                        # "you" — purple circle
-                        circle = plt.Circle((x0 + size/2, y_top), size/2,
-                                            transform=ax.transAxes, color=PURPLE_HEX, lw=0)
-                        ax.add_patch(circle)
-                        ax.text(x0 + 0.05, y_top, tr("you"), transform=ax.transAxes,
-                                ha="left", va="center", fontsize=7.5, color=PURPLE_HEX)
-                        
-                        # "world" — gray square below
-                        ax.add_patch(plt.Rectangle((x0, y_top - y_gap - size / 2),
-                                                   size, size,
-                                                   transform=ax.transAxes,
-                                                   color="#D9D9D9", lw=0))
-                        ax.text(x0 + 0.05, y_top - y_gap, tr("world"),
-                                transform=ax.transAxes, ha="left", va="center",
-                                fontsize=7.5, color="#444444")
-
-
-                        xticks = np.linspace(0, CAP_MIN, 7)
-                        ax.set_xticks(xticks)
-                        xlabels = [str(int(t)) if t < CAP_MIN else "60+" for t in xticks]
-                        ax.set_xticklabels(xlabels)
-                        ax.tick_params(axis="x", labelsize=8, color="#333333")
-                        plt.tight_layout()
-                        plt.tight_layout()
-                        ax.set_position(AX_POS_SLEEP)  # ← lock baseline
-                        st.pyplot(fig, use_container_width=False)
+                    st.image(_latency_png(
+                        samples, part_display,
+                        tr("You fall asleep in {val} minutes", val=rounded_raw),
+                        tr("minutes"), tr("you"), tr("world"),
+                    ), width="stretch")
+
+
+@st.cache_data(show_spinner=False)
+def _duration_png(counts: np.ndarray, highlight_idx: int, title_str: str, hours_lbl: str) -> bytes:
+    """Sleep-duration histogram (1 h bins, participant bin in purple) as PNG bytes."""
+    edges = np.arange(0.5, 12.5 + 1.0, 1.0)
+    centers = 0.5 * (edges[:-1] + edges[1:])
+
+    # ✅ Slightly adjusted figure height (2.52) for perfect x-axis alignment
+    fig, ax = plt.subplots(figsize=(2.2, 2.52))
+    fig.patch.set_alpha(0)
+    ax.set_facecolor("none")
+    ax.bar(centers, counts, width=edges[1]-edges[0],
+           color="#D9D9D9", edgecolor="white", align="center")
+    ax.bar(centers[highlight_idx], counts[highlight_idx],
+           width=edges[1]-edges[0], color=PURPLE_HEX,
+           edgecolor="white", align="center")
+    ax.set_title(title_str, fontproperties=_FP_TITLE, pad=6, color="#222222")
+    ax.set_xlabel(hours_lbl, fontsize=7.5)
+
+    # Remove y-axis
+    ax.set_ylabel("")
+    ax.get_yaxis().set_visible(False)
+    for side in ("left", "right", "top"):
+        ax.spines[side].set_visible(False)
+        ax.spines["bottom"].set_linewidth(0.3)   # thinner x-axis
+
+
+    ticks = np.arange(1, 13, 1)
+    ax.set_xticks(ticks)
+    labels = ["" for _ in ticks]
+    for i in range(4, 11):
+        labels[i-1] = str(i)
+    ax.set_xticklabels(labels)
+    ax.tick_params(axis="x", labelsize=7.5)
+    for label in ax.get_xticklabels():
+        label.set_fontweight("normal")  # ensure not bold`
+        label.set_fontfamily("Inter")  # force same font as rest of UI
+
+    plt.tight_layout()
+    ax.set_position(AX_POS_SLEEP)  # ← lock baseline
+    return _fig_png(fig)
+
 
 # =============================================================================
 # MIDDLE: Sleep duration histogram (perfectly aligned baseline)
@@ -3842,18 +4004,11 @@ with col_mid:
         else:
             col = dur_cols[0]
 
-            def _to_hours_for_plot(x):
-                if x is None: return np.nan
-                s = str(x).strip()
-                if s == "": return np.nan
-                if s.endswith("+"):
-                    try: return float(s[:-1])
-                    except: return 12.0
-                try: return float(s)
-                except: return np.nan
-
-            raw_series = pop_data[col].apply(_to_hours_for_plot)
-            samples_h = raw_series.astype(float).to_numpy()
+            # Hours as numbers; "N+" means N (unparseable "...+" → 12 h cap)
+            txt = pop_data[col].astype(str).str.strip()
+            capped = txt.str.endswith("+")
+            hours = pd.to_numeric(txt.str.removesuffix("+"), errors="coerce")
+            samples_h = hours.mask(capped & hours.isna(), 12.0).to_numpy(dtype=float)
             samples_h = samples_h[np.isfinite(samples_h)]
             samples_h = np.clip(samples_h, 1.0, 12.0)
 
@@ -3878,44 +4033,11 @@ with col_mid:
                 part_hours_plot = float(np.clip(part_hours_plot, 1.0, 12.0))
                 edges = np.arange(0.5, 12.5 + 1.0, 1.0)
                 counts, _ = np.histogram(samples_h, bins=edges, density=True)
-                centers = 0.5 * (edges[:-1] + edges[1:])
                 highlight_idx = np.digitize(part_hours_plot, edges) - 1
                 highlight_idx = np.clip(highlight_idx, 0, len(counts) - 1)
 
-                # ✅ Slightly adjusted figure height (2.52) for perfect x-axis alignment
-                fig, ax = plt.subplots(figsize=(2.2, 2.52))
-                fig.patch.set_alpha(0)
-                ax.set_facecolor("none")
-                ax.bar(centers, counts, width=edges[1]-edges[0],
-                       color="#D9D9D9", edgecolor="white", align="center")
-                ax.bar(centers[highlight_idx], counts[highlight_idx],
-                       width=edges[1]-edges[0], color=PURPLE_HEX,
-                       edgecolor="white", align="center")
-                ax.set_title(title_str, fontsize=8, pad=6, color="#222222")
-                ax.set_xlabel(tr("hours"), fontsize=7.5)
-
-                # Remove y-axis
-                ax.set_ylabel("")
-                ax.get_yaxis().set_visible(False)
-                for side in ("left", "right", "top"):
-                    ax.spines[side].set_visible(False)
-                    ax.spines["bottom"].set_linewidth(0.3)   # thinner x-axis
-
-
-                ticks = np.arange(1, 13, 1)
-                ax.set_xticks(ticks)
-                labels = ["" for _ in ticks]
-                for i in range(4, 11):
-                    labels[i-1] = str(i)
-                ax.set_xticklabels(labels)
-                ax.tick_params(axis="x", labelsize=7.5)
-                for label in ax.get_xticklabels():
-                    label.set_fontweight("normal")  # ensure not bold`
-                    label.set_fontfamily("Inter")  # force same font as rest of UI
-
-                plt.tight_layout()
-                ax.set_position(AX_POS_SLEEP)  # ← lock baseline
-                st.pyplot(fig, use_container_width=False)
+                st.image(_duration_png(counts, int(highlight_idx), title_str, tr("hours")),
+                         width="stretch")
 
 
 
@@ -3955,7 +4077,7 @@ with col_right:
         # Population distributions
         # ---------------------------------------------------------------------
         # Chronotype: 1–3
-        chrono_series = pd.to_numeric(pop_data.get("chronotype"), errors="coerce")
+        chrono_series = pd.Series(_col_values("chronotype"))
         chrono_counts = (
             chrono_series.value_counts(dropna=True)
             .reindex([1, 2, 3], fill_value=0)
@@ -3964,7 +4086,7 @@ with col_right:
         chrono_x = np.arange(1, 4)
 
         # Dream recall: full 1–5 scale
-        recall_raw = pd.to_numeric(pop_data.get("dream_recall"), errors="coerce")
+        recall_raw = pd.Series(_col_values("dream_recall"))
         recall_counts = (
             recall_raw.value_counts(dropna=True)
             .reindex([1, 2, 3, 4, 5], fill_value=0)
@@ -4103,7 +4225,7 @@ with col_right:
             top=0.98,
         )
 
-        st.pyplot(fig, use_container_width=False)
+        _show_fig(fig)
 
 
 
@@ -4182,7 +4304,7 @@ with exp_left:
     if img_name:
         img_path = os.path.join("assets", img_name)
         try:
-            st.image(img_path, use_container_width=True)
+            st.image(img_path, width="stretch")
         except Exception:
             st.info("Trajectory image not found.")
     else:
@@ -4200,64 +4322,55 @@ FIELDS = [
     ("degreequest_emotionality",    "positive\nemotions"),
     ("degreequest_sleepiness",      "sleepy"),
 ]
-
-def _as_float_or_nan(x):
-    try:
-        v = float(x)
-        return np.nan if np.isnan(v) else v
-    except Exception:
-        return np.nan
-
-# Pull values from current participant record (1..6 scale expected)
-vals = [_as_float_or_nan(record.get(k)) for k, _ in FIELDS]
+_NUM_VARS = len(FIELDS)
+_RADAR_ANGLES = np.linspace(0, 2 * np.pi, _NUM_VARS, endpoint=False)
+_RADAR_ANGLES_DEG = np.degrees(_RADAR_ANGLES)
+_RADAR_ANGLES_CLOSED = np.concatenate([_RADAR_ANGLES, _RADAR_ANGLES[:1]])
+# Label alignment per axis: centred at top/bottom, left on the right half, right on the left half
+_RADAR_HALIGN = np.where(np.isclose(_RADAR_ANGLES, 0) | np.isclose(_RADAR_ANGLES, np.pi), "center",
+                         np.where((_RADAR_ANGLES > 0) & (_RADAR_ANGLES < np.pi), "left", "right"))
+
+# Pull values from current participant record (1..6 scale expected), one vectorised parse + clip
+vals = np.clip(pd.to_numeric(pd.Series([record.get(k) for k, _ in FIELDS], dtype=object),
+                             errors="coerce").to_numpy(dtype=float), 1.0, 6.0)
 labels = [tr(lab) for _, lab in FIELDS]
 
-# If all missing, default to zeros so the chart still renders
-if np.all(np.isnan(vals)):
-    vals_filled = [0.0] * len(vals)
-else:
-    mean_val = float(np.nanmean(vals))
-    vals_filled = [mean_val if np.isnan(v) else v for v in vals]
-
-# Close the loop for polar plot
-values = vals_filled + [vals_filled[0]]
-num_vars = len(vals_filled)
-angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-angles_p = angles + angles[:1]
+# Missing axes take the participant's own mean; all missing → zeros so the chart still renders
+missing = np.isnan(vals)
+vals_filled = np.where(missing, np.nanmean(vals) if not missing.all() else 0.0, vals)
 
 # Visual style (kept identical to your app’s radar)
 POLY, GRID, SPINE, TICK, LABEL = PURPLE_HEX, "#B0B0B0", "#222222", "#555555", "#000000"
 s = 1.4  # global scale used in your originals
 
-with exp_mid:
-    fig, ax = plt.subplots(figsize=(3.0 * s, 3.0 * s), subplot_kw=dict(polar=True))
+@st.cache_resource(show_spinner=False)
+def _radar_skeleton(labels: tuple, title: str):
+    """Static radar frame (title, labels, grid, spokes), built once per language.
+
+    Returns (fig, ax, lock); callers draw the polygon under the lock and remove it afterwards.
+    """
+    fig = Figure(figsize=(3.0 * s, 3.0 * s))  # not registered with pyplot: lives as long as the cache
+    ax = fig.add_subplot(polar=True)
     fig.patch.set_alpha(0)
     ax.set_facecolor("none")
     
-    ax.set_title(tr("Intensity of your experience"), fontsize=20, pad=56, color="#222")
+    ax.set_title(title, fontsize=20, pad=56, color="#222")
     ax.title.set_y(1.03)
 
 
     # Orientation and labels
     ax.set_theta_offset(np.pi / 2)
     ax.set_theta_direction(-1)
-    ax.set_thetagrids(np.degrees(angles), labels)
+    ax.set_thetagrids(_RADAR_ANGLES_DEG, labels)
 
     # Fine-tune label alignment
-    for lbl, ang in zip(ax.get_xticklabels(), angles):
-        if ang in (0, np.pi):
-            lbl.set_horizontalalignment("center")
-        elif 0 < ang < np.pi:
-            lbl.set_horizontalalignment("left")
-        else:
-            lbl.set_horizontalalignment("right")
-        lbl.set_color(LABEL)
-        lbl.set_fontsize(8.5 * s)
+    for lbl, ha in zip(ax.get_xticklabels(), _RADAR_HALIGN):
+        lbl.update({"horizontalalignment": ha, "color": LABEL, "fontsize": 8.5 * s})
     ax.tick_params(axis="x", pad=int(2.5 * s))
 
     # Radial settings
     ax.set_ylim(0, 6)
-    ax.set_rgrids([1, 2, 3, 4, 5, 6], angle=180 / num_vars, color=TICK)
+    ax.set_rgrids([1, 2, 3, 4, 5, 6], angle=180 / _NUM_VARS, color=TICK)
     ax.tick_params(axis="y", labelsize=7.0 * s, colors=TICK, pad=-1)
 
     # Grid & spine
@@ -4265,16 +4378,48 @@ with exp_mid:
     ax.spines["polar"].set_color(SPINE)
     ax.spines["polar"].set_linewidth(0.7 * s)
 
-    # Data polygon
-    ax.plot(angles_p, values, color=POLY, linewidth=1.0 * s, zorder=3)
-    ax.fill(angles_p, values, color=POLY, alpha=0.22, zorder=2)
-
-    # Light spokes
-    for a in angles:
-        ax.plot([a, a], [0, 6], color=GRID, linewidth=0.4 * s, alpha=0.35, zorder=1)
+    # Light spokes (one collection instead of one Line2D per axis)
+    spokes = LineCollection([[(a, 0), (a, 6)] for a in _RADAR_ANGLES],
+                            colors=GRID, linewidths=0.4 * s, alpha=0.35, zorder=1)
+    ax.add_collection(spokes, autolim=False)
+
+    fig.tight_layout(pad=0.3 * s)
+    return fig, ax, threading.Lock()
+
+@st.cache_data(show_spinner=False)
+def _radar_svg(vals_filled: tuple, labels: tuple, title: str) -> str:
+    """Radar chart as inline SVG markup: the cached skeleton plus this record's polygon."""
+    # Close the loop for polar plot
+    values = np.concatenate([vals_filled, vals_filled[:1]])
+
+    fig, ax, lock = _radar_skeleton(labels, title)
+    with lock:
+        # Data polygon
+        line, = ax.plot(_RADAR_ANGLES_CLOSED, values, color=POLY, linewidth=1.0 * s, zorder=3)
+        patch, = ax.fill(_RADAR_ANGLES_CLOSED, values, color=POLY, alpha=0.22, zorder=2)
+        try:
+            buf = io.StringIO()
+            with matplotlib.rc_context({"svg.hashsalt": "dm-radar"}):  # stable element ids
+                fig.savefig(buf, format="svg", bbox_inches="tight", metadata={"Date": None})
+        finally:
+            line.remove()
+            patch.remove()
+    svg = buf.getvalue()
+    svg = svg[svg.index("<svg"):]  # drop the XML prolog/doctype
+    svg = re.sub(r"<metadata>.*?</metadata>", "", svg, count=1, flags=re.S)
+    svg = svg.replace("*{", ".dm-radar *{", 1)  # inline <style> is page-global: scope it
+    # Scale with the column instead of the fixed pt size, on one line so markdown keeps it raw
+    svg = re.sub(r'width="[^"]*" height="[^"]*"', 'style="width:100%;height:auto;display:block"',
+                 svg, count=1)
+    return re.sub(r"\s*\n\s*", " ", svg)
 
-    plt.tight_layout(pad=0.3 * s)
-    st.pyplot(fig, use_container_width=False)
+with exp_mid:
+    st.markdown(
+        "<div class='dm-radar'>"
+        + _radar_svg(tuple(vals_filled.tolist()), tuple(labels), tr("Intensity of your experience"))
+        + "</div>",
+        unsafe_allow_html=True,
+    )
 
 # RIGHT column (placeholder for future content)
 # with exp_right:
@@ -4338,66 +4483,55 @@ TIME_VARS = [
     "timequest_syn","timequest_creat"
 ]
 
-def _core_name(v): 
-    return re.sub(r"^(freq_|timequest_)", "", v)
-
-def _as_float(x): 
-    try: 
-        return float(x)
-    except: 
-        return np.nan
+# Concept names without the "freq_" / "timequest_" prefix (every var carries one)
+CORE_FREQ = tuple(v.removeprefix("freq_") for v in FREQ_VARS)
+CORE_TIME = tuple(v.removeprefix("timequest_") for v in TIME_VARS)
 
 # Pair time (1..100) with frequency (1..6) per concept, and keep only complete pairs
-freq_scores = {_core_name(v): _as_float(record.get(v, np.nan)) for v in FREQ_VARS}
-time_scores = {_core_name(v): _as_float(record.get(v, np.nan)) for v in TIME_VARS}
-common = [c for c in time_scores if c in freq_scores and not np.isnan(time_scores[c]) and not np.isnan(freq_scores[c])]
-
-# Build core tuples: (concept_key, time, freq, label)
-cores = []
-for c in common:
-    t = float(time_scores[c]); f = float(freq_scores[c])
-    lab = CUSTOM_LABELS.get(f"freq_{c}", c.replace("_", " "))
-    cores.append((c, t, f, lab))
-
-# --- 2 bins across 1..100 (1–50, 51–100)
-bins = [(1.0, 50.0), (51.0, 100.0)]
-
-# Assign items to bins
-bin_items = {i: [] for i in range(len(bins))}
-for c, t, f, lab in cores:
-    for i, (lo, hi) in enumerate(bins):
-        if lo <= t <= hi:
-            bin_items[i].append((c, t, f, lab))
-            break
+# (one to_numeric pass over both blocks, indexed by core name, then split)
+_ft_vals = pd.to_numeric(pd.Series([record.get(v) for v in FREQ_VARS + TIME_VARS],
+                                   index=CORE_FREQ + CORE_TIME, dtype=object),
+                         errors="coerce")
+freq_s = _ft_vals.iloc[:len(FREQ_VARS)].dropna()
+time_s = _ft_vals.iloc[len(FREQ_VARS):].dropna()
+
+# Concept table: time, frequency and label per complete pair (inner join keeps TIME_VARS order)
+cores = pd.concat([time_s.rename("t"), freq_s.rename("f")], axis=1, join="inner").astype(float)
+cores["label"] = [CUSTOM_LABELS.get(f"freq_{c}", c.replace("_", " ")) for c in cores.index]
+
+# --- 2 bins across 1..100 (1–50, 51–100); times falling between bins are dropped
+bins = pd.IntervalIndex.from_tuples([(1.0, 50.0), (51.0, 100.0)], closed="both")
+cores["bin"] = pd.cut(cores["t"], bins).cat.codes  # -1 = outside every bin
 
 # Winners per bin: top 3 by frequency (break ties by label for determinism)
-winners = {0: [], 1: []}
-for i, items in bin_items.items():
-    if not items:
-        continue
-    items_sorted = sorted(items, key=lambda x: (-x[2], x[3]))  # highest freq, then label
-    winners[i] = [it[3] for it in items_sorted[:3]]
+top = (cores[cores["bin"] >= 0]
+       .sort_values(["f", "label"], ascending=[False, True], kind="mergesort")
+       .groupby("bin").head(3))
+top_labels = top.groupby("bin")["label"].agg(list).to_dict()
+winners = {i: top_labels.get(i, []) for i in range(len(bins))}
 # If a bin is completely empty → display "no content"
 for i in winners:
     if len(winners[i]) == 0:
         winners[i] = [tr("no content")]
 
 # --- Plot (horizontal bar with L→R gradient: Awake → Asleep)
-with exp_right:
-    
-    st.markdown(
-    f"<div class='dm-subtitle-dynamics' style='color:#222; text-align:center; margin-bottom:6px;'>{tr('Dynamics of your experience')}</div>",
-    unsafe_allow_html=True
-)
-    
-    # keep it slightly lowered on the page
-    st.markdown("<div style='height:1px;'></div>", unsafe_allow_html=True)
-
-    fig, ax = plt.subplots(figsize=(6.0, 3.0))
+@st.cache_data(show_spinner=False)
+def _drift_gradient(n: int = 1200) -> np.ndarray:
+    """Awake → Asleep ramp as a (1, n, 4) uint8 RGBA row (colour-mapped once, not per draw)."""
+    cmap = LinearSegmentedColormap.from_list("drift", ["#FFFFFF", "#5B21B6"])
+    return cmap(np.linspace(0.0, 1.0, n)[None, :], bytes=True)
+
+_DRIFT_RGBA = _drift_gradient()
+
+@st.cache_data(show_spinner=False)
+def _timeline_png(labels0: tuple, labels1: tuple, awake_lbl: str, asleep_lbl: str) -> bytes:
+    """Awake → Asleep bar with the early (labels0) / late (labels1) items, as PNG bytes."""
+    fig = Figure(figsize=(6.0, 3.0))
+    ax = fig.add_subplot()
     fig.patch.set_alpha(0)
     ax.set_facecolor("none")
     ax.axis("off")
-    
+
 
 
     # Geometry
@@ -4408,14 +4542,9 @@ with exp_right:
     def tx(val):  # map 1..100 → x in [x_left, x_right]
         return x_left + (val - 1.0) / 99.0 * (x_right - x_left)
 
-    # Bar gradient
-    left_rgb = np.array([1.0, 1.0, 1.0])
-    right_rgb = np.array([0x5B/255, 0x21/255, 0xB6/255])
-    n = 1200
-    cols = np.linspace(left_rgb, right_rgb, n)
-    grad_img = np.tile(cols[None, :, :], (12, 1, 1))
+    # Bar gradient (1-row RGBA ramp; imshow stretches it vertically)
     ax.imshow(
-        grad_img,
+        _DRIFT_RGBA,
         extent=(tx(1), tx(100), y_bar - bar_half_h, y_bar + bar_half_h),
         origin="lower",
         aspect="auto",
@@ -4424,9 +4553,9 @@ with exp_right:
 
     # In-bar end labels
     end_fs = 22
-    ax.text(tx(6),   y_bar, tr("LBL_Awake"),  ha="left",  va="center",
+    ax.text(tx(6),   y_bar, awake_lbl,  ha="left",  va="center",
         fontsize=end_fs, color="#000000")
-    ax.text(tx(94),  y_bar, tr("LBL_Asleep"), ha="right", va="center",
+    ax.text(tx(94),  y_bar, asleep_lbl, ha="right", va="center",
             fontsize=end_fs, color="#FFFFFF")
 
 
@@ -4434,6 +4563,7 @@ with exp_right:
     label_fs = 15.0   # smaller text for both lists
     stem_lw = 1.6
     row_gap = 0.05    # keep same spacing between each item
+    stems = []        # one stem per non-empty bin, drawn as a single LineCollection
 
     # Bin 0 (1–50): one stem around x≈33, labels above the bar (stacked downward)
     top_anchor_x = tx(33.0)
@@ -4442,18 +4572,12 @@ with exp_right:
                      top_base_y - row_gap,
                      top_base_y - 2 * row_gap]
 
-    if winners[0]:
-        labels0 = winners[0]
+    if labels0:
         # Use only as many positions as labels, starting from the one closest to the bar
         pos0 = top_positions[-len(labels0):]  # 1 label → [closest]; 2 → [mid, closest]; 3 → all
         nearest_top = min(pos0)  # numerically closest to the bar
 
-        ax.plot(
-            [top_anchor_x, top_anchor_x],
-            [y_bar + bar_half_h, nearest_top - 0.018],
-            color="#000000",
-            linewidth=stem_lw,
-        )
+        stems.append([(top_anchor_x, y_bar + bar_half_h), (top_anchor_x, nearest_top - 0.018)])
 
         for yy, text_label in zip(pos0, labels0):
             ax.text(
@@ -4474,18 +4598,12 @@ with exp_right:
                      bot_base_y + row_gap,
                      bot_base_y + 2 * row_gap]
 
-    if winners[1]:
-        labels1 = winners[1]
+    if labels1:
         # Use only as many positions as labels, starting from the one closest to the bar
         pos1 = bot_positions[-len(labels1):]
         nearest_bot = max(pos1)  # numerically closest to the bar here
 
-        ax.plot(
-            [bot_anchor_x, bot_anchor_x],
-            [y_bar - bar_half_h, nearest_bot + 0.018],
-            color="#000000",
-            linewidth=stem_lw,
-        )
+        stems.append([(bot_anchor_x, y_bar - bar_half_h), (bot_anchor_x, nearest_bot + 0.018)])
 
         for yy, text_label in zip(pos1, labels1):
             ax.text(
@@ -4500,8 +4618,27 @@ with exp_right:
             )
 
 
-    plt.tight_layout(pad=0.25)
-    st.pyplot(fig, use_container_width=False)
+    if stems:
+        ax.add_collection(LineCollection(stems, colors="#000000", linewidths=stem_lw,
+                                         capstyle="projecting"))
+
+    fig.tight_layout(pad=0.25)
+    return _fig_png(fig)
+
+
+with exp_right:
+    
+    st.markdown(
+    f"<div class='dm-subtitle-dynamics' style='color:#222; text-align:center; margin-bottom:6px;'>{tr('Dynamics of your experience')}</div>",
+    unsafe_allow_html=True
+)
+    
+    # keep it slightly lowered on the page
+    st.markdown("<div style='height:1px;'></div>", unsafe_allow_html=True)
+
+    st.image(_timeline_png(tuple(winners[0]), tuple(winners[1]),
+                           tr("LBL_Awake"), tr("LBL_Asleep")),
+             width="stretch")
 
 
 # --- Explanatory note below "Your Experience" -----------------------------------
@@ -4530,7 +4667,7 @@ st.markdown(
 st.markdown("<div style='height:60px;'></div>", unsafe_allow_html=True)
 
 try:
-    profile_dists = compute_profile_distances(record)
+    profile_dists = _cached_profile_distances(record_sig, record)
 
     if profile_dists:
         # Fixed order (definition order) for reproducibility
@@ -4559,7 +4696,7 @@ try:
         names_sorted_disp = [tr(name) for name in names_sorted]
 
                 # --- Plot (gradient + icons, clean axis) ---
-        fig, ax = plt.subplots(figsize=(7.0, 3.2), dpi=200)
+        fig, ax = plt.subplots(figsize=(7.0, 3.2))
         fig.patch.set_alpha(0)
         ax.set_facecolor("none")
 
@@ -4640,7 +4777,7 @@ try:
                     pass
 
         plt.tight_layout()
-        st.pyplot(fig, use_container_width=True)
+        _show_fig(fig)
 
 
         # Short explanatory line below
@@ -4668,8 +4805,6 @@ except Exception as e:
 # ==============
 # ALL DMs (embedded, centered)
 # ==============
-import base64
-
 # Choose correct image depending on language
 if LANG == "fr":
     final_img_path = "assets/all_DMs_fr.png"
@@ -4680,9 +4815,7 @@ elif LANG == "it":
 else:
     final_img_path = "assets/all_DMs.png"
 
-# Load and encode
-with open(final_img_path, "rb") as f:
-    all_dms_b64 = base64.b64encode(f.read()).decode()
+all_dms_src = _data_uri(final_img_path)
 
 
 st.markdown(
@@ -4693,7 +4826,7 @@ st.markdown(
         align-items: center;
         margin: 50px 0;
     ">
-        <img src="data:image/png;base64,{all_dms_b64}" 
+        <img src="{all_dms_src}" 
              style="max-width: 100%; height: auto; border-radius: 8px;">
     </div>
     """,
@@ -8,13 +8,18 @@ DM: visualisation of DM results (pending API token -> demo)
 @author: nicolas.decat
 """
 
-import os
-import json
 import numpy as np
 import pandas as pd
-import requests
 import streamlit as st
+import matplotlib
+matplotlib.use("Agg")  # headless: figures only ever go to PNG
+matplotlib.rcParams.update({
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000,
+})
 import matplotlib.pyplot as plt
+import plotly.graph_objects as go
 
 
 # To add in Streamlit > Manage app > Settings > Secrets
@@ -52,84 +57,104 @@ SCALES = {
     "Perception":  ["freq_percept_precise", "freq_percept_real", "freq_percept_imposed"],
 }
 
-def safe_float(x):
-    try:
-        return float(x)
-    except:
-        return np.nan
-
-def scale_means(rec: dict) -> pd.Series:
-    means = {}
-    for scale, items in SCALES.items():
-        vals = [safe_float(rec.get(f, np.nan)) for f in items]
-        vals = [v for v in vals if np.isfinite(v)]
-        means[scale] = float(np.mean(vals)) if vals else np.nan
-    return pd.Series(means)
+def scale_means(rec: dict) -> dict[str, float]:
+    # one (n_scales, n_items) grid, ragged scales padded with NaN
+    width = max(len(items) for items in SCALES.values())
+    fields = [f for items in SCALES.values() for f in items + [None] * (width - len(items))]
+    vals = pd.to_numeric(pd.Series([rec.get(f) if f else None for f in fields], dtype=object),
+                         errors="coerce").to_numpy(dtype=float).reshape(len(SCALES), width)
+    vals = np.where(np.isfinite(vals), vals, np.nan)
+    counts = np.sum(~np.isnan(vals), axis=1)
+    means = np.divide(np.nansum(vals, axis=1), counts,
+                      out=np.full(len(SCALES), np.nan), where=counts > 0)
+    return dict(zip(SCALES, means.tolist()))
 
 # 2) Compute means for the radar
 means = scale_means(record)
 
-# 3) RADAR (matplotlib)
-def radar_plot(series: pd.Series, title: str):
-    labels = list(series.index)
-    values = series.values.astype(float)
+# 3) RADAR (plotly: built once per set of means, drawn client-side)
+@st.cache_data(show_spinner=False)
+def radar_plot(means: tuple[tuple[str, float], ...], title: str):
+    labels = [k for k, _ in means]
+    values = [v for _, v in means]
 
     # close the loop
     labels += [labels[0]]
-    values = np.append(values, values[0])
-
-    angles = np.linspace(0, 2*np.pi, len(labels), endpoint=False)
-    fig, ax = plt.subplots(subplot_kw=dict(polar=True))
-    ax.plot(angles, values)
-    ax.fill(angles, values, alpha=0.15)
-    ax.set_xticks(angles)
-    ax.set_xticklabels(labels)
-    ax.set_title(title)
+    values += [values[0]]
+
+    fig = go.Figure(go.Scatterpolar(r=values, theta=labels, fill="toself", opacity=0.85))
+    fig.update_layout(title=title, polar=dict(radialaxis=dict(range=[0, 6])),
+                      showlegend=False, margin=dict(l=40, r=40, t=60, b=40))
     return fig
 
 st.subheader("Your profile (radar)")
-fig_radar = radar_plot(means, "Scale means")
-st.pyplot(fig_radar)
-
-# 4) BAR chart (matplotlib)
-def bar_plot(series: pd.Series, title: str):
-    fig, ax = plt.subplots()
-    series.plot(kind="bar", ax=ax)
-    ax.set_title(title)
-    ax.set_ylabel("Mean score")
-    ax.set_xlabel("Scale")
-    return fig
+st.plotly_chart(radar_plot(tuple(means.items()), "Scale means"), width="stretch")
+
+# 4) BARS (plain HTML/CSS, no matplotlib). The demo's own simple bar style (the former inline
+#    styles) under dm2-* class names; it does not reproduce the results page's bar rules.
+BAR_CSS = """
+<style>
+.dm2-row   { display:flex; align-items:center; gap:0.75rem; margin:0.35rem 0; }
+.dm2-label { width:6rem; }
+.dm2-track { flex:1; background:#EEEEEE; border-radius:8px; }
+.dm2-fill  { height:16px; border-radius:8px; background:#1f77b4; }
+.dm2-value { width:3rem; text-align:right; }
+</style>
+"""
+
+def html_bar(label: str, pct: float) -> str:
+    if np.isfinite(pct):
+        width = 100 * min(max(pct, 0.0), 1.0)
+        value = f"{width:.0f}%"
+    else:
+        width, value = 0.0, "NA"
+    return (
+        "<div class='dm2-row'>"
+        f"<span class='dm2-label'>{label}</span>"
+        f"<div class='dm2-track'><div class='dm2-fill' style='width:{width:.0f}%;'></div></div>"
+        f"<span class='dm2-value'>{value}</span>"
+        "</div>"
+    )
 
 st.subheader("Breakdown by scale")
-fig_bar = bar_plot(means, "Scale means")
-st.pyplot(fig_bar)
+st.markdown(BAR_CSS + "".join(html_bar(scale, m / 6) for scale, m in means.items()),
+            unsafe_allow_html=True)
 
 # 5) (Optional) You vs. crowd — fake distribution for demo
 st.subheader("How you compare to others (demo)")
 # create a fake distribution around 1..5 Likert with some noise
-rng = np.random.default_rng(42)
-dist = pd.DataFrame({
-    "Thoughts":   rng.normal(loc=3.0, scale=0.8, size=300).clip(1, 5),
-    "Perception": rng.normal(loc=3.2, scale=0.7, size=300).clip(1, 5),
-})
+# (fixed seed → constant, so it is drawn once and reused across reruns)
+@st.cache_data
+def crowd_demo(n: int = 300):
+    rng = np.random.default_rng(42)
+    dist = pd.DataFrame({
+        "Thoughts":   rng.normal(loc=3.0, scale=0.8, size=n).clip(1, 5),
+        "Perception": rng.normal(loc=3.2, scale=0.7, size=n).clip(1, 5),
+    })
+    jitter = {scale: rng.normal(0, 0.1, size=n) for scale in dist}
+    return dist, jitter
+
+dist, jitter = crowd_demo()
 
 # show percentiles and your point
 stats = dist.describe(percentiles=[0.25, 0.5, 0.75]).loc[["25%", "50%", "75%"]]
 st.write("Percentiles (demo):")
 st.dataframe(stats)
 
-# simple scatter “cloudpoint” per scale (jittered)
-for scale in means.index:
-    st.write(f"Distribution for **{scale}** (demo)")
-    x = rng.normal(0, 0.1, size=len(dist))  # jitter
-    fig, ax = plt.subplots()
-    ax.scatter(x, dist[scale], s=10, alpha=0.4)
+# simple scatter “cloudpoint” per scale (jittered), all scales side by side in one figure
+st.write("Distribution per scale (demo)")
+fig, axes = plt.subplots(1, len(means), figsize=(3.8 * len(means), 3.2), sharey=True, squeeze=False)
+for ax, scale in zip(axes[0], means):
+    ax.scatter(jitter[scale], dist[scale], s=10, alpha=0.4)
     ax.scatter([0], [means[scale]], s=120, marker="x")  # your value
     ax.set_xticks([])
-    ax.set_ylabel("Score (1–5)")
     ax.set_title(scale)
-    st.pyplot(fig)
+axes[0][0].set_ylabel("Score (1–5)")
+st.pyplot(fig)
+plt.close(fig)
 
 # Show raw responses (useful to debug field mapping)
+# (expander bodies run even when collapsed, so the JSON is only sent once asked for)
 with st.expander("See your raw responses (demo)"):
-    st.json(record)
\ No newline at end of file
+    if st.checkbox("Load raw responses", key="show_raw"):
+        st.json(record)
\ No newline at end of file
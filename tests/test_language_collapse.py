@@ -0,0 +1,65 @@
+"""Language collapse on a filtered REDCap export (columns not led by record metadata)."""
+import csv
+import io
+import os
+from unittest import mock
+
+import pandas as pd
+import pytest
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(REPO, "DM_results_viz.py")
+POP_CSV = os.path.join(REPO, "assets", "N3100_comparative_viz_ready.csv")
+
+
+def _fr_export(row=0):
+    """One population row as a filtered FR export: record_id, then each answer's _fr copy
+    placed *before* its blank English column, as REDCap orders fields by project, not request."""
+    src = pd.read_csv(POP_CSV, dtype=str, keep_default_na=False).iloc[row].to_dict()
+    rec = {"record_id": "42"}
+    for k, v in src.items():
+        if k == "record_id" or k.endswith("_complete") or "timestamp" in k:
+            continue
+        rec[f"{k}_fr"] = v[:-2] if v.endswith(".0") else v
+        rec[k] = ""
+    rec["questionnaire_complete"] = ""
+    rec["questionnaire_fr_complete"] = "2"
+    return rec
+
+
+def _post(rec):
+    """Session.post stand-in: CSV export of the requested fields[] only, in the record's order."""
+    def post(self, url, data=None, **kw):
+        wanted = {v for k, v in data.items() if k.startswith("fields[")}
+        row = {k: v for k, v in rec.items() if not wanted or k == "record_id" or k in wanted}
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=list(row))
+        writer.writeheader()
+        writer.writerow(row)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = buf.getvalue().encode()
+        return resp
+    return post
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    os.chdir(REPO)  # the app reads assets/ relative to the working directory
+
+
+def test_filtered_fr_export_keeps_suffixed_answers():
+    rec = _fr_export()
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets["REDCAP_API_URL"] = "https://example.invalid/api/"
+    at.secrets["REDCAP_API_TOKEN"] = "x"
+    at.query_params["id"] = "42"
+    with mock.patch("requests.Session.post", _post(rec)):
+        at.run()
+    assert not at.exception, [e.message for e in at.exception]
+    assert not at.error, [e.value for e in at.error]